@@ -4,106 +4,193 @@ The signal can be generated using the SignalGenerator class or loaded from a fil
 """
 
 from pydmd import BOPDMD
-from pydmd.preprocessing import hankel_preprocessing
 from pydmd.plotter import plot_summary
 from signal_generator import SignalGenerator
 import matplotlib.pyplot as plt
 from scipy.io import savemat, loadmat
+from scipy.sparse.linalg import svds
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from threadpoolctl import threadpool_limits
+from joblib import Parallel, delayed
+
+
+def fit_trial(hankel_signal, t, trial_size, init_alpha, seed, bopdmd_kwargs):
+    """
+    Fit BOPDMD without bagging on a random subset of the snapshots, mirroring a
+    single BOPDMD bagging trial. Returns the eigenvalues and amplitudes, sorted
+    by the imaginary and then the real part of the eigenvalues (as BOPDMD's
+    eig_sort="imag" does) so that they line up across trials.
+    """
+    rng = np.random.default_rng(seed)
+    n_snapshots = hankel_signal.shape[1]
+    subset = np.sort(rng.choice(n_snapshots, int(trial_size*n_snapshots), replace=False))
+    with threadpool_limits(limits=1, user_api="blas"):
+        trial_optdmd = BOPDMD(num_trials=0, init_alpha=init_alpha, **bopdmd_kwargs)
+        trial_optdmd.fit(hankel_signal[:, subset], t=t[subset])
+    order = np.lexsort((trial_optdmd.eigs.real, trial_optdmd.eigs.imag))
+    return trial_optdmd.eigs[order], trial_optdmd.amplitudes[order]
+
 
 # Parameters
 generate_data = False  # set to True to generate data, False to load data from file
 save_data = True  # only relevant if generate_data=True
-filename_save = "data/data_new.mat"  # path to save the data, if save_data=True
-filename_load = "data/data.mat"  # path to load the data from, if generate_data=False
+filename_save = "data/data_new.mat"  # path to save the data (.mat or .npz), if save_data=True
+filename_load = "data/data.mat"  # path to load the data (.mat or .npz) from, if generate_data=False
 plot_results = True
 apply_eig_constraints = False  # set to True to apply imaginary eigenvalue constraints
+complex_signal = False  # set to True to generate complex travelling waves, only relevant if generate_data=True
+num_trials = 0  # number of bagging trials, run in parallel if > 0
+trial_seed = 0  # random seed for the bagging trials, for reproducibility
+trial_size = 0.6  # fraction of the snapshots used in each bagging trial
+n_jobs = -1  # number of processes for the bagging trials, -1 to use all cores
+blas_threads = 2  # number of BLAS threads for the SVD and BOPDMD fit, None to use all cores
 
 if generate_data:
-    # Create a signal generator - currently generates a signal with three sinusoids and noise
+    # Create a signal generator - currently generates a signal with three sinusoids
+    # (or three complex travelling waves, if complex_signal=True) and noise
     signal_generator = SignalGenerator(x_min=-5, x_max=5, t_max=60)
-    signal_generator.add_sinusoid1(a=2, omega=0.5, k=1.5)
-    signal_generator.add_sinusoid1(a=1, omega=2.5, k=1)
-    signal_generator.add_sinusoid1(a=1, omega=5, k=-2)
+    if complex_signal:
+        signal_generator.add_complex_mode(a=2, omega=0.5, k=1.5)
+        signal_generator.add_complex_mode(a=1, omega=2.5, k=1)
+        signal_generator.add_complex_mode(a=1, omega=5, k=-2)
+    else:
+        signal_generator.add_sinusoids_batch(a=[2, 1, 1], omega=[0.5, 2.5, 5], k=[1.5, 1, -2])
     signal_generator.add_noise(random_seed=42)
     signal = signal_generator.signal
     t = signal_generator.t
     x = signal_generator.x
 
     if save_data:
-        savemat(filename_save, {
-            "signal": signal,
-            "t": t,
-            "x": x,
-        })
+        # .npz is a raw binary dump, faster to write and read than .mat
+        if filename_save.endswith(".npz"):
+            np.savez(filename_save, signal=signal, t=t, x=x)
+        else:
+            savemat(filename_save, {
+                "signal": signal,
+                "t": t,
+                "x": x,
+            }, format="5", do_compression=False, oned_as="row")
 else:
     try:
         print("Loading data...")
-        data = loadmat(filename_load)
-        signal = data["signal"]
-        t = (data["t"]).squeeze()
-        x = (data["x"]).squeeze()
+        if filename_load.endswith(".npz"):
+            with np.load(filename_load) as data:
+                signal = data["signal"]
+                t = data["t"]
+                x = data["x"]
+        else:
+            data = loadmat(filename_load, squeeze_me=True)
+            signal = data["signal"]
+            t = data["t"]
+            x = data["x"]
     except FileNotFoundError:
         raise FileNotFoundError("Run the script with `generate_data=True` to generate data.")
 
 # Apply BOPDMD without bagging
-svd_rank = 6  # we have three components, so we need 6 DMD modes
-delay = 2  # apply time-delay embedding
-
-if not apply_eig_constraints:
-    optdmd = BOPDMD(
-        svd_rank=svd_rank,
-        num_trials=0,
-        use_proj=True,
-        varpro_opts_dict={
-            "verbose": True,
-            },
-    )
+if np.iscomplexobj(signal):
+    # Each complex component is a single DMD mode, so no time-delay embedding
+    # is needed to recover complex conjugate pairs
+    svd_rank = 3
+    delay = 1
+    index_modes = [0, 1, 2]
 else:
-    optdmd = BOPDMD(
-        svd_rank=svd_rank,
-        num_trials=0,
-        use_proj=True,
-        eig_constraints={"imag"},
-        varpro_opts_dict={
-            "verbose": True,
-            },
-    )
+    svd_rank = 6  # we have three components, so we need 6 DMD modes
+    delay = 2  # apply time-delay embedding
+    index_modes = [0, 2, 4]
+
+# Build the time-delay embedding as a zero-copy view, equivalent to the
+# matrix built by pydmd's hankel_preprocessing(dmd, d=delay). For a C-ordered
+# (nt, nx) signal, row i*nx + j of column c is signal[c+i, j], i.e. column c
+# is the window of length delay*nx starting at offset c*nx of the flat signal.
+# Note that the resulting view is read-only.
+signal = np.ascontiguousarray(signal)
+hankel_signal = sliding_window_view(signal.ravel(), delay*len(x))[::len(x)].T
+t_delay = t[:len(t)-delay+1]
+
+# Only the leading svd_rank POD modes are used for projection, so compute them
+# with a truncated SVD rather than letting BOPDMD run a full dense SVD.
+# svds returns the singular triplets in ascending order, so flip them.
+# The matrices involved are small, so cap the BLAS thread pool to avoid thread
+# start-up and synchronisation overhead dominating the linear algebra.
+with threadpool_limits(limits=blas_threads, user_api="blas"):
+    proj_basis = svds(hankel_signal, k=svd_rank, random_state=0)[0][:, ::-1]
+# Make the basis reproducible by fixing the arbitrary sign (phase) of each singular
+# vector so that its largest-magnitude entry is real and positive
+pivots = proj_basis[np.abs(proj_basis).argmax(axis=0), np.arange(svd_rank)]
+proj_basis = proj_basis * (np.conj(pivots) / np.abs(pivots))
 
-delay_optdmd = hankel_preprocessing(optdmd, d=delay)
-t_delay = t[:-delay+1]
-delay_optdmd.fit(signal.T, t=t_delay)
+bopdmd_kwargs = {
+    "svd_rank": svd_rank,
+    "use_proj": True,
+    "proj_basis": proj_basis,
+}
+if apply_eig_constraints:
+    bopdmd_kwargs["eig_constraints"] = {"imag"}
+
+optdmd = BOPDMD(
+    num_trials=0,
+    varpro_opts_dict={
+        "verbose": True,
+        },
+    **bopdmd_kwargs,
+)
+
+with threadpool_limits(limits=blas_threads, user_api="blas"):
+    optdmd.fit(hankel_signal, t=t_delay)
 
 print("Eigenvalues:")
-print(delay_optdmd.eigs)
+print(optdmd.eigs)
 
 print("Amplitudes:")
-print(delay_optdmd.amplitudes)
+print(optdmd.amplitudes)
+
+# Apply bagging: the trials are independent, so run them in parallel processes,
+# each restricted to a single BLAS thread, and pool the results as BOPDMD does
+if num_trials > 0:
+    trial_results = Parallel(n_jobs=n_jobs, backend="loky")(
+        delayed(fit_trial)(hankel_signal, t_delay, trial_size, optdmd.eigs, seed, bopdmd_kwargs)
+        for seed in np.random.SeedSequence(trial_seed).spawn(num_trials)
+    )
+    trial_eigs, trial_amplitudes = (np.array(result) for result in zip(*trial_results))
+
+    print("Bagged eigenvalues, sorted by imaginary then real part (mean, std):")
+    print(trial_eigs.mean(axis=0))
+    print(trial_eigs.std(axis=0))
+
+    print("Bagged amplitudes, sorted by eigenvalue imaginary then real part (mean, std):")
+    print(trial_amplitudes.mean(axis=0))
+    print(trial_amplitudes.std(axis=0))
 
 if plot_results:
-    plt.rcParams.update({'font.size': 4})
-    plot_summary(delay_optdmd, x=x, d=delay, index_modes=[0, 2, 4])
-    plt.show()
-
-    # plot original vs reconstructed signal
-    plt.rcParams.update({'font.size': 8})
-    reconstructed_signal = delay_optdmd.forecast(t)
-    reconstructed_signal = reconstructed_signal.real[:len(x), :].T
-    levels = np.arange(-1.5, 1.6, 0.1)
-    fig, ax = plt.subplots(1, 2, figsize=(12, 6))
-    ax = ax.flatten()
-    T, X = np.meshgrid(t, x)
-    contour = ax[0].contourf(
-        T, X, signal.T, levels=levels, cmap="bwr"
-        )
-    ax[0].set_xlabel("Time")
-    ax[0].set_ylabel("Space")
-    ax[0].set_title("Original signal", fontsize=10)
-    contour = ax[1].contourf(
-        T, X, reconstructed_signal.T, levels=levels, cmap="bwr"
-        )
-    ax[1].set_xlabel("Time")
-    ax[1].set_ylabel("Space")
-    ax[1].set_title("Reconstructed signal", fontsize=10)
-    plt.colorbar(contour, ax=ax, orientation="vertical")
-    plt.show()
+    # Figures are only rendered by the explicit plt.show() calls and are closed
+    # afterwards to release their memory
+    with plt.ioff():
+        plt.rcParams.update({'font.size': 4})
+        plot_summary(optdmd, x=x, d=delay, index_modes=index_modes)
+        plt.show()
+        plt.close("all")
+
+        # plot original vs reconstructed signal
+        plt.rcParams.update({'font.size': 8})
+        # (space, time) arrays for plotting, made C-contiguous once so that
+        # matplotlib does not have to walk strided transposed views
+        signal_plot = np.ascontiguousarray(signal.real.T)
+        reconstructed_signal_plot = np.ascontiguousarray(optdmd.forecast(t).real[:len(x), :])
+        fig, ax = plt.subplots(1, 2, figsize=(12, 6))
+        ax = ax.flatten()
+        mesh = ax[0].pcolormesh(
+            t, x, signal_plot, vmin=-1.5, vmax=1.5, cmap="bwr", shading="auto"
+            )
+        ax[0].set_xlabel("Time")
+        ax[0].set_ylabel("Space")
+        ax[0].set_title("Original signal", fontsize=10)
+        mesh = ax[1].pcolormesh(
+            t, x, reconstructed_signal_plot, vmin=-1.5, vmax=1.5, cmap="bwr", shading="auto"
+            )
+        ax[1].set_xlabel("Time")
+        ax[1].set_ylabel("Space")
+        ax[1].set_title("Reconstructed signal", fontsize=10)
+        plt.colorbar(mesh, ax=ax, orientation="vertical")
+        plt.show()
+        plt.close(fig)
@@ -1,4 +1,6 @@
 import numpy as np
+from scipy.integrate import trapezoid
+from scipy.special import erf, erfc
 
 
 class SignalGenerator:
@@ -19,29 +21,36 @@ class SignalGenerator:
         Minimum temporal coordinate. Default is 0.
     t_max : float
         Maximum temporal coordinate. Default is 50.
+    dtype : data-type
+        Floating-point type of the signal, np.float32 or np.float64. Default is
+        np.float32. The signal is promoted to the matching complex type when a
+        complex mode is added.
     x : np.ndarray
         Spatial coordinate vector with shape (nx,)
     t : np.ndarray
         Temporal coordinate vector with shape (nt,)
-    X : np.ndarray
-        Spatial coordinate matrix with shape (nt, nx)
-    T : np.ndarray
-        Temporal coordinate matrix with shape (nt, nx)
     signal : np.ndarray
         Synthesized spatio-temporal signal with shape (nt, nx)
     components : list
-        List of dictionaries containing the signal components
+        List of dictionaries containing the type and parameters of the signal
+        components. Use `regenerate` to recompute the signal of a component.
 
     Methods
     -------
     add_sinusoid1(a=1, k=0.1, omega=1, gamma=0)
         Generate a sinusoidal signal of the form: a*sin(k*x - omega*t)*exp(gamma*t)
+    add_sinusoids_batch(a, k, omega, gamma=0)
+        Generate several sinusoidal signals of the form: a*sin(k*x - omega*t)*exp(gamma*t)
     add_sinusoid2(a=1, k=0.2, omega=1, c=0)
         Generate a sinusoidal signal of the form: a*(exp(-k*(x+c)^2)*cos(omega*t)
+    add_complex_mode(a=1, k=0.1, omega=1)
+        Generate a complex travelling wave of the form: a*exp(i*(k*x - omega*t))
     add_trend(mu=0.2, trend=0.01)
         Generate a linear trend in time of the form: mu + trend*t
     add_noise(noise_std=0.1, random_seed=None)
         Add Gaussian noise to the signal.
+    regenerate(i)
+        Recompute the i-th signal component from its stored parameters.
 
     """
 
@@ -53,11 +62,13 @@ class SignalGenerator:
             x_max=10,
             t_min=0,
             t_max=50,
+            dtype=np.float32,
     ):
+        if np.dtype(dtype) not in (np.float32, np.float64):
+            raise ValueError(f"dtype must be np.float32 or np.float64, got {np.dtype(dtype)}.")
         self.x = np.linspace(x_min, x_max, nx)
         self.t = np.linspace(t_min, t_max, nt)
-        self.X, self.T = np.meshgrid(self.x, self.t)
-        self.signal = np.zeros(self.X.shape)
+        self.signal = np.zeros((nt, nx), dtype=dtype)
         self.components = []
 
     def add_sinusoid1(self, a=1, k=0.1, omega=1, gamma=0):
@@ -75,14 +86,35 @@ class SignalGenerator:
         gamma : float, optional
             Temporal decay rate of the signal, by default 0
         """
-        signal = np.sin(k*self.X - omega*self.T)*np.exp(gamma*self.T)
-        spatial_norm = np.linalg.norm(signal, axis=-1, ord=2)
-        signal = signal / spatial_norm[:, None]
-        signal = a * signal
-        my_dict = {'type': 'sinusoid1', 'a': a, 'k': k, 'omega': omega, 'gamma': gamma, 'signal': signal}
+        signal = self._sinusoid1(a, k, omega, gamma)
+        my_dict = {'type': 'sinusoid1', 'a': a, 'k': k, 'omega': omega, 'gamma': gamma}
         self.components.append(my_dict)
         self.signal += signal
 
+    def add_sinusoids_batch(self, a, k, omega, gamma=0):
+        """
+        Generate several sinusoidal signals of the form: a*sin(k*x - omega*t)*exp(gamma*t)
+        in a single vectorised pass. This is equivalent to calling add_sinusoid1 once
+        for each set of parameters.
+
+        Parameters
+        ----------
+        a : array_like
+            Amplitudes of the sinusoidal signals
+        k : array_like
+            Spatial frequencies of the signals
+        omega : array_like
+            Temporal frequencies of the signals
+        gamma : array_like, optional
+            Temporal decay rates of the signals, by default 0
+        """
+        a, k, omega, gamma = np.broadcast_arrays(*map(np.atleast_1d, (a, k, omega, gamma)))
+        signal = self._sinusoid1(a, k, omega, gamma)
+        for a_i, k_i, omega_i, gamma_i in zip(a.tolist(), k.tolist(), omega.tolist(), gamma.tolist()):
+            my_dict = {'type': 'sinusoid1', 'a': a_i, 'k': k_i, 'omega': omega_i, 'gamma': gamma_i}
+            self.components.append(my_dict)
+        self.signal += signal.sum(axis=0)
+
     def add_sinusoid2(self, a=1, k=0.2, omega=1, c=0):
         """
         Generate a sinusoidal signal of the form: a*(exp(-k*(x+c)^2)*cos(omega*t)
@@ -92,17 +124,39 @@ class SignalGenerator:
         a : float, optional
             Amplitude (area under the curve) of the signal, by default 1
         k : float, optional
-            Spatial exponential decay rate of the signal, by default 0.2
+            Spatial exponential decay rate of the signal, by default 0.2. The area is
+            computed analytically for k > 0; k = 0 gives a spatially uniform signal
+            and k < 0 a growing profile, whose area is integrated numerically
         omega : float, optional
             Temporal frequency of the signal, by default 1
         c : float, optional
             Offset of the signal, by default 0
         """
-        spatial_signal = np.exp(-k*(self.X+c)**2)
-        area = np.trapz(spatial_signal, self.x, axis=-1)[0]  # Compute the area under the curve
-        signal = a * spatial_signal / area * np.cos(omega*self.T)
-        my_dict = {'type': 'sinusoid2', 'a': a, 'k': k, 'omega': omega, 'c': c, 'signal': signal}
+        signal = self._sinusoid2(a, k, omega, c)
+        my_dict = {'type': 'sinusoid2', 'a': a, 'k': k, 'omega': omega, 'c': c}
+        self.components.append(my_dict)
+        self.signal += signal
+
+    def add_complex_mode(self, a=1, k=0.1, omega=1):
+        """
+        Generate a complex travelling wave of the form: a*exp(i*(k*x - omega*t)).
+        Each such component corresponds to a single DMD mode, whereas a real
+        sinusoid requires a complex conjugate pair. Adding a complex mode promotes
+        the signal to a complex dtype.
+
+        Parameters
+        ----------
+        a : float, optional
+            Amplitude of the wave, by default 1
+        k : float, optional
+            Spatial frequency of the wave, by default 0.1
+        omega : float, optional
+            Temporal frequency of the wave, by default 1
+        """
+        signal = self._complex_mode(a, k, omega)
+        my_dict = {'type': 'complex_mode', 'a': a, 'k': k, 'omega': omega}
         self.components.append(my_dict)
+        self.signal = self.signal.astype(signal.dtype, copy=False)
         self.signal += signal
 
     def add_trend(self, mu=0.2, trend=0.01):
@@ -116,14 +170,15 @@ class SignalGenerator:
         trend : float, optional
             Slope of the trend, by default 0.01
         """
-        signal = self.T*trend + mu
-        my_dict = {'type': 'trend', 'mu': mu, 'trend': trend, 'signal': signal}
+        signal = self._trend(mu, trend)
+        my_dict = {'type': 'trend', 'mu': mu, 'trend': trend}
         self.components.append(my_dict)
         self.signal += signal
 
     def add_noise(self, noise_std=0.1, random_seed=None):
         """
-        Add Gaussian noise to the signal.
+        Add Gaussian noise to the signal. For complex signals, independent noise
+        is added to the real and imaginary parts.
 
         Parameters
         ----------
@@ -132,5 +187,109 @@ class SignalGenerator:
         random_seed : int, optional
             Random seed for reproducibility, by default None
         """
-        np.random.seed(random_seed)
-        self.signal += np.random.normal(0, noise_std, self.signal.shape)
+        rng = np.random.default_rng(random_seed)
+        noise = rng.standard_normal(self.signal.shape, dtype=self.signal.real.dtype)
+        noise *= noise_std
+        self.signal += noise
+        if np.iscomplexobj(self.signal):
+            noise = rng.standard_normal(self.signal.shape, dtype=self.signal.real.dtype)
+            noise *= noise_std
+            self.signal.imag += noise
+
+    def regenerate(self, i):
+        """
+        Recompute the i-th signal component from its stored parameters.
+
+        Parameters
+        ----------
+        i : int
+            Index of the component in the components list
+
+        Returns
+        -------
+        np.ndarray
+            Signal of the component with shape (nt, nx). Real components keep the
+            real floating-point dtype even if the signal has been promoted to complex.
+            Trend components are returned as a read-only broadcast view.
+        """
+        params = dict(self.components[i])
+        component_type = params.pop('type')
+        return getattr(self, '_' + component_type)(**params)
+
+    def _sinusoid1(self, a, k, omega, gamma):
+        """
+        Compute a*sin(k*x - omega*t)*exp(gamma*t), normalised in space.
+
+        The parameters are scalars, giving a signal with shape (nt, nx), or arrays
+        with shape (M,), giving M stacked signals with shape (M, nt, nx).
+        """
+        a, k, omega = (np.asarray(p)[..., None] for p in (a, k, omega))
+        # Evaluate sin and cos of the spatial and temporal phases together as
+        # exp(1j*phase) on the 1-D coordinate vectors only
+        wave_x = np.exp(1j*k*self.x)
+        wave_t = np.exp(1j*omega*self.t)
+        # Each row has L2 norm exp(gamma*t)*||sin(k*x - omega*t)||, so the decay
+        # cancels on normalisation. The remaining norm is computed analytically from
+        # sum_j sin(k*x_j - omega*t)**2 = (nx - Re(S*exp(-2i*omega*t)))/2,
+        # where S = sum_j exp(2i*k*x_j), instead of reducing the full array
+        s = np.sum(wave_x**2, axis=-1, keepdims=True)
+        spatial_norm = np.sqrt(0.5*(self.x.size - (s*np.conj(wave_t)**2).real))
+        # sin(k*x - omega*t) = cos(omega*t)*sin(k*x) - sin(omega*t)*cos(k*x), so the
+        # normalised signal is the product of (nt, 2) temporal and (2, nx) spatial
+        # factors, computed by a single matmul into the output
+        temporal = np.stack((wave_t.real, -wave_t.imag), axis=-1) * (a / spatial_norm)[..., None]
+        spatial = np.stack((wave_x.imag, wave_x.real), axis=-2)
+        dtype = self.signal.real.dtype
+        signal = np.matmul(temporal.astype(dtype), spatial.astype(dtype))
+        return signal
+
+    def _sinusoid2(self, a, k, omega, c):
+        """Compute a*(exp(-k*(x+c)^2)*cos(omega*t), normalised by the spatial area."""
+        spatial_signal = np.exp(-k*(self.x+c)**2)
+        # Compute the area under the curve analytically for k > 0, using
+        # int exp(-k*(x+c)^2) dx = sqrt(pi/k)/2 * erf(sqrt(k)*(x+c))
+        area = np.nan
+        if k > 0:
+            sqrt_k = np.sqrt(k)
+            lo, hi = sqrt_k*(self.x[0]+c), sqrt_k*(self.x[-1]+c)
+            # When the peak lies outside the grid, both erf values are close to +/-1
+            # and their difference cancels, so take it between the erfc tails instead
+            if lo >= 0:
+                erf_diff = erfc(lo) - erfc(hi)
+            elif hi <= 0:
+                erf_diff = erfc(-hi) - erfc(-lo)
+            else:
+                erf_diff = erf(hi) - erf(lo)
+            area = 0.5*np.sqrt(np.pi/k)*erf_diff
+        elif k == 0:
+            # Spatially uniform signal
+            area = self.x[-1] - self.x[0]
+        if not (np.isfinite(area) and area > 0):
+            # Growing profile (k < 0), with no real-valued closed form, or tails
+            # beyond the range of erfc: integrate numerically
+            area = trapezoid(spatial_signal, self.x)
+        # The signal is separable in space and time, so it is the outer product
+        # of the (nt,) temporal and (nx,) spatial vectors
+        dtype = self.signal.real.dtype
+        signal = np.multiply.outer(
+            np.cos(omega*self.t).astype(dtype), (a * spatial_signal / area).astype(dtype)
+        )
+        return signal
+
+    def _complex_mode(self, a, k, omega):
+        """Compute a*exp(i*(k*x - omega*t)), normalised in space."""
+        # |exp(i*phase)| = 1, so every row has L2 norm sqrt(nx), and the wave is the
+        # outer product of the (nt,) temporal and (nx,) spatial phasors
+        dtype = np.result_type(self.signal.dtype, np.complex64)
+        temporal = a / np.sqrt(self.x.size) * np.exp(-1j*omega*self.t)
+        signal = np.multiply.outer(temporal.astype(dtype), np.exp(1j*k*self.x).astype(dtype))
+        return signal
+
+    def _trend(self, mu, trend):
+        """Compute mu + trend*t, broadcast in space."""
+        # The trend is constant in space, so broadcast the (nt, 1) column
+        # to the signal shape as a read-only view rather than a copy
+        signal = np.broadcast_to(
+            (self.t[:, None]*trend + mu).astype(self.signal.real.dtype), self.signal.shape
+        )
+        return signal